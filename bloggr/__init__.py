@@ -1,20 +1,25 @@
 from flask import Flask
-from flask_mail import Mail
-from dotenv import load_dotenv
 
 import os
 
-load_dotenv()
-
-mail = Mail()
-
 def create_app(test_config=None):
+    if test_config is None:
+        #load the .env file, when not testing
+        from dotenv import load_dotenv
+        load_dotenv()
+
     #create and configure the app
     app = Flask(__name__, instance_relative_config = True)
     app.config.from_mapping(
         SECRET_KEY = os.environ.get('SECRET_KEY', 'dev'),
         DATABASE = os.path.join(app.instance_path, "BLOGGR.sqlite"),
 
+        # "sqlite" uses DATABASE, "postgresql" a pool of DATABASE_URL connections
+        DATABASE_BACKEND = os.environ.get('DATABASE_BACKEND', 'sqlite'),
+        DATABASE_URL = os.environ.get('DATABASE_URL'),
+        DATABASE_POOL_MIN = 1,
+        DATABASE_POOL_MAX = 10,
+
         SESSION_COOKIE_SECURE=True,     
         SESSION_COOKIE_HTTPONLY=True,    
         SESSION_COOKIE_SAMESITE='Lax', 
@@ -29,6 +34,35 @@ def create_app(test_config=None):
         MAIL_USERNAME=os.environ.get('MAIL_USERNAME'),
         MAIL_PASSWORD=os.environ.get('MAIL_PASSWORD'),
         MAIL_DEFAULT_SENDER=os.environ.get('MAIL_DEFAULT_SENDER'),
+
+        # create mail and OAuth clients on first use instead of at startup
+        LAZY_EXTENSIONS=True,
+
+        COMPRESS_RESPONSES=True,
+        COMPRESS_MIN_SIZE=500,
+        COMPRESS_LEVEL=6,
+        COMPRESS_MIMETYPES=[
+            'text/html', 'text/css', 'text/plain',
+            'application/json', 'application/javascript',
+        ],
+
+        # ranking of /popular, refreshed by `flask refresh-popular`
+        POPULAR_HALF_LIFE_HOURS=24,
+        POPULAR_LIMIT=30,
+
+        # /api/events long-poll, in seconds and events per response; each
+        # waiting client ties up a worker thread, see README
+        EVENTS_MAX_WAIT=25,
+        EVENTS_POLL_INTERVAL=1,
+        EVENTS_BATCH_SIZE=100,
+
+        # compiled templates shared by all workers, None to disable
+        JINJA_BYTECODE_CACHE=os.path.join(app.instance_path, "jinja_cache"),
+
+        # precompile templates and prime caches when the app is created
+        WARMUP=False,
+        WARMUP_REPLAY=False,
+        WARMUP_PATHS=['/', '/auth/login', '/auth/register'],
     )
     
     if test_config is None:
@@ -49,20 +83,44 @@ def create_app(test_config=None):
     # def hello():
     #     return "Hello, to the World!"
     
-    mail.init_app(app)
+    from . import templating
+    templating.init_app(app)
+
+    if not app.config["LAZY_EXTENSIONS"]:
+        from . import extensions
+        extensions.init_app(app)
 
     from . import db
     db.init_app(app)
+
+    from . import repository
+    repository.init_app(app)
+
+    from . import assets
+    assets.init_app(app)
     
     from . import auth
     app.register_blueprint(auth.bp)
 
-    auth.google = auth.init_oauth(app)
+    from . import profiling
+    profiling.init_app(app)
 
     from . import blog
     app.register_blueprint(blog.bp)
     app.add_url_rule("/", endpoint="index")
 
+    from . import popular
+    popular.init_app(app)
+
+    from . import api
+    app.register_blueprint(api.bp)
+
+    from . import warmup
+    warmup.init_app(app)
+
+    if app.config["WARMUP"]:
+        warmup.warmup(app)
+
     return app
 
 
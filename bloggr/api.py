@@ -0,0 +1,61 @@
+import math
+import time
+
+from flask import Blueprint, current_app, jsonify, request
+
+from bloggr.repository import get_repository
+
+bp = Blueprint("api", __name__, url_prefix="/api")
+
+
+def _event_json(event):
+    return {
+        "seq": event["seq"],
+        "kind": event["kind"],
+        "post_id": event["post_id"],
+        "user_id": event["user_id"],
+        "created": event["created"].isoformat(),
+    }
+
+
+@bp.route("/events")
+def events():
+    """Long-poll for changes: returns the events after `since`, waiting up
+    to `timeout` seconds for one if there are none yet. Without `since` it
+    only returns the current position to start from, and so does a `since`
+    that is no event's seq (e.g. kept across a database re-init).
+
+    A waiting request holds a worker thread, not a database connection, for
+    up to EVENTS_MAX_WAIT seconds, so serve the app with threaded workers
+    (e.g. gunicorn --worker-class gthread --threads 32)."""
+    repository = get_repository()
+    broker = repository.broker
+    config = current_app.config
+
+    since = request.args.get("since", type=int)
+    if since is None or (since != 0 and not repository.events.exists(since)):
+        return jsonify(events=[], last_seq=repository.events.last_seq())
+
+    timeout = request.args.get("timeout", config["EVENTS_MAX_WAIT"], type=float)
+    if not math.isfinite(timeout):
+        timeout = config["EVENTS_MAX_WAIT"]
+    deadline = time.monotonic() + min(max(timeout, 0), config["EVENTS_MAX_WAIT"])
+
+    # read the broker before the table: anything committed after this
+    # point is published above `seen` and wakes the wait below
+    seen = max(since, broker.last_seq)
+    events = repository.events.since(since, config["EVENTS_BATCH_SIZE"])
+
+    while not events:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        # park without holding a database connection
+        repository.backend.release()
+        broker.wait(seen, min(remaining, config["EVENTS_POLL_INTERVAL"]))
+        seen = max(seen, broker.last_seq)
+        events = repository.events.since(since, config["EVENTS_BATCH_SIZE"])
+
+    last_seq = events[-1]["seq"] if events else since
+    return jsonify(events=[_event_json(event) for event in events], last_seq=last_seq)
@@ -0,0 +1,187 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import with_appcontext
+
+try:                                        # pip install bloggr[brotli], without it only .gz files are built
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+ONE_YEAR = 365 * 24 * 60 * 60
+
+COMPRESSIBLE = (".css", ".js", ".svg", ".html", ".txt", ".json", ".xml")
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def build_assets(static_folder):
+    """Copy every static file into dist/ under a content hash name and
+    precompress the text ones. Returns the manifest that was written."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    os.makedirs(dist)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist]
+
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            filename = os.path.relpath(source, static_folder).replace(os.sep, "/")
+
+            with open(source, "rb") as f:
+                data = f.read()
+
+            stem, ext = os.path.splitext(filename)
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            built = f"{DIST_DIR}/{stem}.{digest}{ext}"
+            target = os.path.join(static_folder, built)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            with open(target, "wb") as f:
+                f.write(data)
+
+            encodings = []
+            if ext in COMPRESSIBLE:
+                for encoding, suffix in ENCODINGS:
+                    compressed = _precompress(encoding, data)
+                    if compressed is not None and len(compressed) < len(data):
+                        with open(target + suffix, "wb") as f:
+                            f.write(compressed)
+                        encodings.append(encoding)
+
+            manifest[filename] = {"path": built, "encodings": encodings}
+
+    with open(os.path.join(dist, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return manifest
+
+
+def _precompress(encoding, data):
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+
+def load_manifest(app):
+    state = {"paths": {}, "encodings": {}}
+    path = os.path.join(app.static_folder, DIST_DIR, MANIFEST)
+
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    for filename, entry in manifest.items():
+        state["paths"][filename] = entry["path"]
+        state["encodings"][entry["path"]] = entry["encodings"]
+
+    app.extensions["bloggr_assets"] = state
+    return state
+
+
+def fingerprint_static(endpoint, values):
+    # rewrites url_for("static", filename="style.css") to the built file
+    if endpoint != "static" or "filename" not in values:
+        return
+
+    paths = current_app.extensions["bloggr_assets"]["paths"]
+    built = paths.get(values["filename"])
+
+    if built is not None:
+        values["filename"] = built
+
+
+def send_static(filename):
+    encodings = current_app.extensions["bloggr_assets"]["encodings"].get(filename)
+
+    if encodings is None:
+        return current_app.send_static_file(filename)
+
+    for encoding, suffix in ENCODINGS:
+        if encoding in encodings and _accepts(encoding):
+            response = send_from_directory(
+                current_app.static_folder,
+                filename + suffix,
+                mimetype=_guess_mimetype(filename),
+                max_age=ONE_YEAR,
+            )
+            response.headers["Content-Encoding"] = encoding
+            break
+    else:
+        response = send_from_directory(
+            current_app.static_folder, filename, max_age=ONE_YEAR
+        )
+
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _accepts(encoding):
+    # "gzip;q=0" is kept by werkzeug, so check the quality, not membership
+    return request.accept_encodings.quality(encoding) > 0
+
+
+def _guess_mimetype(filename):
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def compress_response(response):
+    config = current_app.config
+
+    if (
+        not config["COMPRESS_RESPONSES"]
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in config["COMPRESS_MIMETYPES"]
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    if not _accepts("gzip"):
+        return response
+
+    data = response.get_data()
+
+    if len(data) < config["COMPRESS_MIN_SIZE"]:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=config["COMPRESS_LEVEL"]))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+@click.command("build-assets")
+@with_appcontext
+def build_assets_command():
+    """Fingerprint and precompress the static files."""
+    manifest = build_assets(current_app.static_folder)
+    load_manifest(current_app)
+    click.echo(f"Built {len(manifest)} static asset(s).")
+
+
+def init_app(app):
+    load_manifest(app)
+    app.url_defaults(fingerprint_static)
+    app.view_functions["static"] = send_static
+    app.after_request(compress_response)
+    app.cli.add_command(build_assets_command)
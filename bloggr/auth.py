@@ -1,6 +1,5 @@
 import functools
 import secrets
-import sqlite3
 import threading
 
 from flask import (
@@ -15,10 +14,6 @@ from flask import (
     current_app
 )
 
-from flask_mail import Message
-
-from authlib.integrations.flask_client import OAuth
-
 from werkzeug.security import (
     check_password_hash, 
     generate_password_hash
@@ -27,22 +22,19 @@ from werkzeug.security import (
 from itsdangerous import URLSafeTimedSerializer
 
 
-from bloggr.db import get_db
-from bloggr import mail
+from bloggr.repository import IntegrityError, get_repository
+from bloggr.extensions import get_google, get_mail
 
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
-oauth = OAuth()
-google = None
-
 @bp.route("/register", methods = ("GET", "POST"))
 def register():
     if request.method == "POST":
         username = request.form["username"]
         password = request.form["password"]
         email = request.form["email"]
-        db = get_db()
+        users = get_repository().users
         error = None
 
         if not username:
@@ -54,12 +46,8 @@ def register():
 
         if error is None:
             try:
-                db.execute(
-                    "INSERT INTO user (username, email, password) VALUES (?, ?, ?)",
-                    (username, email, generate_password_hash(password))
-                )
-                db.commit()
-            except sqlite3.IntegrityError:
+                users.create(username, email, generate_password_hash(password))
+            except IntegrityError:
                 error = f"User {username} is already registered."
                 flash(error)
                 return render_template("auth/register.html")
@@ -91,30 +79,13 @@ def register():
     return render_template("auth/register.html")
 
 
-def init_oauth(app):
-    oauth.init_app(app)
-    google = oauth.register(
-        name = "google",
-        client_id = app.config.get("GOOGLE_CLIENT_ID"),
-        client_secret = app.config.get("GOOGLE_CLIENT_SECRET"),
-        server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-        client_kwargs = {"scope": "openid email profile"},
-    )
-
-    return google
-
-
 @bp.route("/login", methods = ("GET", "POST"))
 def login():
     if request.method == "POST":
         username_or_email = request.form["username_or_email"]
         password = request.form["password"]
-        db = get_db()
         error = None
-        user = db.execute(
-            "SELECT * FROM user WHERE username = ? OR email = ?",
-            (username_or_email, username_or_email),            
-        ).fetchone()
+        user = get_repository().users.get_by_login(username_or_email)
 
         if user is None:
             error = "Incorrect Username or Email!"
@@ -135,7 +106,7 @@ def login():
 def login_google():
     try:
         redirect_url = url_for("auth.authorize_google", _external = True)
-        return google.authorize_redirect(redirect_url)
+        return get_google().authorize_redirect(redirect_url)
     except Exception as e:
         current_app.logger.error(f"Error logging in: {str(e)}")
         flash("Error occurred during login")
@@ -144,6 +115,7 @@ def login_google():
 @bp.route("/authorize/google")
 def authorize_google():
     try:
+        google = get_google()
         token = google.authorize_access_token()
         
         if not token:
@@ -165,28 +137,18 @@ def authorize_google():
         
         username = email.split('@')[0]
 
-        db = get_db()
-        user = db.execute(
-            "SELECT * FROM user WHERE email = ?", (email,)
-        ).fetchone() 
+        users = get_repository().users
+        user = users.get_by_email(email)
 
         if not user:
 
             random_password = secrets.token_urlsafe(32)
 
             try:
-                db.execute(
-                    "INSERT INTO user (username, email, password) VALUES (?, ?, ?)",
-                    (username, email, generate_password_hash(random_password))
-                )
-                db.commit()
-            except sqlite3.IntegrityError:
+                users.create(username, email, generate_password_hash(random_password))
+            except IntegrityError:
                 username = f"{username}_{secrets.token_hex(4)}"
-                db.execute(
-                    "INSERT INTO user (username, email, password) VALUES (?, ?, ?)",
-                    (username, email, generate_password_hash(random_password))
-                )
-                db.commit()
+                users.create(username, email, generate_password_hash(random_password))
 
             # try:
             #     send_welcome_email(email, username)
@@ -204,9 +166,7 @@ def authorize_google():
             thread.daemon = True
             thread.start()
 
-            user = db.execute(
-                "SELECT * FROM user WHERE email = ?", (email,)
-            ).fetchone()
+            user = users.get_by_email(email)
 
         session.clear()
 
@@ -227,9 +187,7 @@ def load_logged_in_user():
     if user_id is None:
         g.user = None
     else:
-        g.user = get_db().execute(
-            "SELECT * FROM user WHERE id = ?", (user_id,)
-        ).fetchone()
+        g.user = get_repository().users.get(user_id)
 
 
 @bp.route("/logout")
@@ -259,19 +217,12 @@ def change_password():
     if request.method == "POST":
         current_password = request.form["current_password"]
         new_password = request.form["new_password"]
-        db = get_db()
+        users = get_repository().users
         user_id = g.user["id"]
-        user = db.execute(
-            "SELECT * FROM user WHERE id = ?", (user_id,)
-        ).fetchone() 
+        user = users.get(user_id)
 
         if check_password_hash(user["password"], current_password):
-            db.execute(
-            "UPDATE user SET password = ? "
-            "WHERE id = ? ",
-            (generate_password_hash(new_password), user_id)
-            )
-            db.commit()
+            users.set_password(user_id, generate_password_hash(new_password))
             flash("Password changed successfully!")
             return redirect(url_for("auth.login"))
         else:
@@ -282,6 +233,8 @@ def change_password():
 
 
 def send_password_reset_email(user_email, token):
+    from flask_mail import Message
+
     try:
         reset_url = url_for("auth.reset_password", token = token, _external = True)
 
@@ -294,7 +247,7 @@ def send_password_reset_email(user_email, token):
         msg.html = render_template("email/reset_password.html", reset_url = reset_url)
 
         try:
-            mail.send(msg)
+            get_mail().send(msg)
             current_app.logger.info(f"Password reset email sent to {user_email}")
         except Exception as e:
             print(f"SMTP Error: {str(e)}")
@@ -306,6 +259,8 @@ def send_password_reset_email(user_email, token):
         return False
 
 def send_welcome_email(user_email, username, login_url):
+    from flask_mail import Message
+
     try:
         msg = Message(
             subject='Welcome to Bloggr!',
@@ -321,7 +276,7 @@ def send_welcome_email(user_email, username, login_url):
         )
 
         try:
-            mail.send(msg)
+            get_mail().send(msg)
             current_app.logger.info(f"Welcome email sent to {user_email}")
         except Exception as e:
             current_app.logger.error(f"SMTP connection failed: {e}")
@@ -347,10 +302,7 @@ def forgot_password():
     
     if request.method == "POST":
         email = request.form["email"]
-        db = get_db()
-        user = db.execute(
-            "SELECT * FROM user WHERE email = ? ", (email,)
-        ).fetchone() 
+        user = get_repository().users.get_by_email(email)
 
         if user:
             try:
@@ -379,13 +331,9 @@ def reset_password(token):
     
     if request.method =="POST":
         new_password = request.form["new_password"]
-        db = get_db()
-
-        db.execute(
-            "UPDATE user SET password = ? WHERE email = ?",
-            (generate_password_hash(new_password), email)
+        get_repository().users.set_password_by_email(
+            email, generate_password_hash(new_password)
         )
-        db.commit()
 
         flash("Your password has been reset!")
         return redirect(url_for("auth.login"))
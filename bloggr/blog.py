@@ -4,26 +4,25 @@ from flask import (
     g, 
     redirect, 
     render_template, 
-    request, url_for
+    request, url_for,
+    current_app
 )
 from werkzeug.exceptions import abort
 from bloggr.auth import login_required
-from bloggr.db import get_db
+from bloggr.repository import get_repository
 
 bp = Blueprint("blog", __name__)
 
 @bp.route("/")
 def index():
-    db = get_db()
-    posts = db.execute(
-        """
-            SELECT p.id, title, body, created, author_id, username
-            FROM post p JOIN user u ON p.author_id = u.id
-            ORDER BY created DESC
-        """,
-    ).fetchall()
+    posts = get_repository().posts.list()
     return render_template("blog/index.html", posts=posts)
 
+@bp.route("/popular")
+def popular():
+    posts = get_repository().popular.list(current_app.config["POPULAR_LIMIT"])
+    return render_template("blog/popular.html", posts=posts)
+
 @bp.route("/create", methods = ("GET", "POST"))
 @login_required
 def create():
@@ -38,26 +37,13 @@ def create():
         if error is not None:
             flash(error)
         else:
-            db = get_db()
-            db.execute(
-                "INSERT INTO post (title, body, author_id)"
-                "VALUES (?, ?, ?)",
-                (title, body, g.user["id"])
-            )
-            db.commit()
+            get_repository().posts.create(title, body, g.user["id"])
             return redirect(url_for("blog.index"))
         
     return render_template("blog/create.html")
 
 def get_post(id, check_author=True):
-    post = get_db().execute(
-        """
-            SELECT p.id, title, body, created, author_id, username
-            FROM post p JOIN user u ON p.author_id = u.id
-            WHERE p.id = ?
-        """,
-        (id,)
-    ).fetchone()
+    post = get_repository().posts.get(id)
 
     if post is None:
         abort(404, f"Post id {id} doesn't exit.")
@@ -91,13 +77,7 @@ def update(id):
             flash(error)
 
         else:
-            db = get_db()
-            db.execute(
-                "UPDATE post SET title = ?, body = ?"
-                "WHERE id = ?",
-                (title, body, id)
-            )
-            db.commit()
+            get_repository().posts.update(id, title, body, g.user["id"])
             return redirect(url_for("blog.index"))
         
     return render_template("blog/update.html", post = post)
@@ -106,42 +86,22 @@ def update(id):
 @login_required
 def delete(id):
     get_post(id)
-    db = get_db()
-    db.execute("DELETE FROM post WHERE id = ?", (id,))
-    db.commit()
+    get_repository().posts.delete(id, g.user["id"])
     return redirect(url_for("blog.index"))
 
 @bp.route("/<int:id>/like", methods= ("POST",))
 @login_required
 def like_post(id):
-    db = get_db()
     post = get_post(id, check_author=False)
+    get_repository().likes.add(id, g.user["id"])
 
-    current_likes = db.execute(
-        "SELECT id FROM post_likes WHERE post_id = ? AND user_id =?",
-        (id, g.user["id"])
-    ).fetchone()
-
-    if current_likes is None:
-        db.execute(
-            "INSERT INTO pos_likes (post_id, user_id) VALUES (?, ?)",
-            (id, g.user["id"])
-        )
-        db.commit()
-
-    return redirect(url_for("blog_index"))
+    return redirect(url_for("blog.index"))
 
 
 @bp.route("/<int:id>/unlike", methods= ("POST",))
 @login_required
 def unlike_post(id):
-    db = get_db()
     post = get_post(id, check_author=False)
-
-    db.execute(
-        "DELETE FROM post_like WHERE post_id =? AND user_id = ?",
-        (id, g.user["id"])
-    )
-    db.commit()
+    get_repository().likes.remove(id, g.user["id"])
 
     return redirect(url_for("blog.index"))
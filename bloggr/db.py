@@ -1,7 +1,9 @@
 import sqlite3
+import time
 from datetime import datetime
 
 import click
+from flask.cli import AppGroup
 from flask import current_app, g            # g is an object provided by Flask. It is a global namespace for holding any data you want during a single app context.
                                             # Also think of g as a request-scoped storage object where you create attributes dynamically that last only for that request.
 def get_db():                               # Why use g? if not g, you might need to create a new db everytime needed or create a global db shared by everyone which is very risky
@@ -21,11 +23,31 @@ def close_db(e = None):
         db.close()
 
 
+def _run_script(name):
+    # schema.sql / upgrade.sql, or their _postgresql twins
+    postgresql = current_app.config['DATABASE_BACKEND'] == 'postgresql'
+    if postgresql:
+        name = name.replace('.sql', '_postgresql.sql')
+
+    with current_app.open_resource(name) as f:
+        script = f.read().decode('utf8')
+
+    if postgresql:
+        from bloggr.repository import get_repository
+        get_repository().backend.executescript(script)
+    else:
+        get_db().executescript(script)
+
+
 def init_db():
-    db = get_db()
+    _run_script('schema.sql')
+    upgrade_db()
+
 
-    with current_app.open_resource('schema.sql') as f:
-        db.executescript(f.read().decode('utf8'))
+def upgrade_db():
+    """Create the tables and indexes added since the database was first
+    initialized, keeping all existing data."""
+    _run_script('upgrade.sql')
 
 
 @click.command('init-db')
@@ -35,6 +57,118 @@ def init_db_command():
     click.echo('Initialized the database.')
 
 
+def maintain_db(vacuum_pages=1000, full_vacuum=False, analyze=False, checkpoint="PASSIVE"):
+    """Reclaim free pages, refresh planner statistics and checkpoint the WAL.
+    Everything except full_vacuum is safe to run while the app is serving.
+
+    auto_vacuum can only be switched on an existing file by a VACUUM, so
+    full_vacuum also turns on INCREMENTAL mode for databases created before
+    schema.sql set it."""
+    db = get_db()
+    report = {}
+
+    freelist = db.execute("PRAGMA freelist_count").fetchone()[0]
+    if full_vacuum:
+        db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        db.execute("VACUUM")
+    elif db.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:   # INCREMENTAL
+        # execute() only steps this pragma once (one page), executescript runs it to the end
+        db.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+    report["freed_pages"] = freelist - db.execute("PRAGMA freelist_count").fetchone()[0]
+    report["incremental"] = db.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    if analyze:
+        db.execute("ANALYZE")
+    db.execute("PRAGMA optimize")
+    db.commit()
+
+    if db.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+        busy, log, checkpointed = db.execute(
+            f"PRAGMA wal_checkpoint({checkpoint})"
+        ).fetchone()
+        report["checkpoint"] = (busy, log, checkpointed)
+
+    return report
+
+
+def backup_db(dest, pages=256, delay=0.05, progress=None):
+    """Copy the live database to dest with the online backup API, copying
+    `pages` pages at a time and sleeping `delay` seconds between steps.
+
+    The whole copy runs inside one read transaction, so every step reads the
+    same WAL snapshot. Writers keep committing meanwhile. Without the
+    transaction, any write between steps restarts the backup from page 1."""
+    def step(status, remaining, total):
+        if progress is not None:
+            progress(remaining, total)
+        if remaining:
+            time.sleep(delay)
+
+    source = sqlite3.connect(current_app.config["DATABASE"], isolation_level=None)
+    target = sqlite3.connect(dest)
+    try:
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        source.backup(target, pages=pages, progress=step)
+        source.execute("COMMIT")
+    finally:
+        target.close()
+        source.close()
+
+
+db_cli = AppGroup('db', help='Database maintenance commands.')
+
+
+def _require_sqlite():
+    if current_app.config['DATABASE_BACKEND'] != 'sqlite':
+        raise click.ClickException('This command only supports the sqlite backend.')
+
+
+@db_cli.command('maintain')
+@click.option('--vacuum-pages', default=1000, show_default=True,
+              help='Free pages to reclaim with incremental vacuum.')
+@click.option('--full-vacuum', is_flag=True,
+              help='Rebuild the whole file with VACUUM and enable incremental '
+                   'vacuum (blocks writers).')
+@click.option('--analyze', is_flag=True, help='Run a full ANALYZE.')
+@click.option('--checkpoint', default='PASSIVE', show_default=True,
+              type=click.Choice(['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'], case_sensitive=False))
+def maintain_command(vacuum_pages, full_vacuum, analyze, checkpoint):
+    """Vacuum, optimize and checkpoint the database."""
+    _require_sqlite()
+    report = maintain_db(vacuum_pages, full_vacuum, analyze, checkpoint.upper())
+    click.echo(f"Freed {report['freed_pages']} page(s).")
+
+    if not report['incremental']:
+        click.echo(
+            'Incremental vacuum is off for this database, so no pages can be '
+            'reclaimed. Run `flask db maintain --full-vacuum` once to turn it on '
+            '(it blocks writers while it runs).'
+        )
+
+    if 'checkpoint' in report:
+        busy, log, checkpointed = report['checkpoint']
+        click.echo(f"Checkpointed {checkpointed} of {log} WAL frame(s){' (busy)' if busy else ''}.")
+
+
+@db_cli.command('upgrade')
+def upgrade_command():
+    """Add new tables to an existing database without losing data."""
+    upgrade_db()
+    click.echo('Upgraded the database.')
+
+
+@db_cli.command('backup')
+@click.argument('dest', type=click.Path(dir_okay=False))
+@click.option('--pages', default=256, show_default=True, help='Pages copied per step.')
+@click.option('--delay', default=0.05, show_default=True, help='Seconds to sleep between steps.')
+def backup_command(dest, pages, delay):
+    """Copy the live database to DEST."""
+    _require_sqlite()
+    backup_db(dest, pages, delay)
+    click.echo(f'Backed up the database to {dest}.')
+
+
 sqlite3.register_converter(
     "timestamp", lambda v: datetime.fromisoformat(v.decode())
 )
@@ -42,3 +176,4 @@ sqlite3.register_converter(
 def init_app(app):
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
+    app.cli.add_command(db_cli)
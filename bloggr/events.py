@@ -0,0 +1,26 @@
+import threading
+
+
+class EventBroker:
+    """Wakes long-poll requests parked in this process when a new event is
+    committed. Waiters in other worker processes are not notified, they
+    recheck the event table every EVENTS_POLL_INTERVAL seconds instead."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._last_seq = 0
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    def publish(self, seq):
+        with self._condition:
+            self._last_seq = max(self._last_seq, seq)
+            self._condition.notify_all()
+
+    def wait(self, after, timeout):
+        """Block until an event newer than `after` is published here or
+        timeout runs out. Returns whether one was."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._last_seq > after, timeout)
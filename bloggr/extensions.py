@@ -0,0 +1,45 @@
+import threading
+
+from flask import current_app
+
+# Flask-Mail and Authlib (which pulls in requests and cryptography) are
+# only imported the first time an email is sent or a Google login starts.
+
+_lock = threading.Lock()
+
+
+def get_mail(app=None):
+    app = app or current_app._get_current_object()
+
+    if "mail" not in app.extensions:
+        with _lock:
+            if "mail" not in app.extensions:
+                from flask_mail import Mail
+                Mail(app)
+
+    return app.extensions["mail"]
+
+
+def get_google(app=None):
+    app = app or current_app._get_current_object()
+
+    if "bloggr.google" not in app.extensions:
+        with _lock:
+            if "bloggr.google" not in app.extensions:
+                from authlib.integrations.flask_client import OAuth
+                oauth = OAuth(app)
+                app.extensions["bloggr.google"] = oauth.register(
+                    name = "google",
+                    client_id = app.config.get("GOOGLE_CLIENT_ID"),
+                    client_secret = app.config.get("GOOGLE_CLIENT_SECRET"),
+                    server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
+                    client_kwargs = {"scope": "openid email profile"},
+                )
+
+    return app.extensions["bloggr.google"]
+
+
+def init_app(app):
+    """Create every extension up front instead of on first use."""
+    get_mail(app)
+    get_google(app)
@@ -0,0 +1,49 @@
+import math
+import time
+from datetime import timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from bloggr.repository import get_repository
+
+
+def make_score(half_life_hours):
+    """Rank value for a post. Every half-life of age weighs as much as a
+    doubling of likes, but the value itself never changes with time, so
+    only posts with new likes ever need rescoring."""
+    seconds = half_life_hours * 60 * 60
+
+    def score(likes, created):
+        created = created.replace(tzinfo=timezone.utc)
+        return math.log2(1 + likes) + created.timestamp() / seconds
+
+    return score
+
+
+def refresh_popular(full=False):
+    score = make_score(current_app.config["POPULAR_HALF_LIFE_HOURS"])
+    return get_repository().popular.refresh(score, full)
+
+
+@click.command("refresh-popular")
+@click.option("--full", is_flag=True,
+              help="Rebuild the whole ranking from scratch.")
+@click.option("--interval", type=float,
+              help="Keep running, refreshing every INTERVAL seconds.")
+@with_appcontext
+def refresh_popular_command(full, interval):
+    """Refresh the popular posts ranking from new posts, likes and unlikes."""
+    while True:
+        click.echo(f"Rescored {refresh_popular(full)} post(s).")
+
+        if interval is None:
+            break
+
+        full = False
+        time.sleep(interval)
+
+
+def init_app(app):
+    app.cli.add_command(refresh_popular_command)
@@ -0,0 +1,49 @@
+import subprocess
+import sys
+
+import click
+
+_SCRIPT = (
+    "import time; start = time.perf_counter();"
+    "from bloggr import create_app; create_app();"
+    "print(time.perf_counter() - start)"
+)
+
+
+def profile_imports():
+    """Create the app in a fresh interpreter with -X importtime and return
+    the wall time plus (cumulative_us, self_us, module) rows."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), module.strip()))
+
+    return float(result.stdout.strip().splitlines()[-1]), rows
+
+
+@click.command("profile-imports")
+@click.option("--top", default=20, show_default=True, help="Number of imports to show.")
+def profile_imports_command(top):
+    """Report which imports dominate create_app() startup time."""
+    elapsed, rows = profile_imports()
+    rows.sort(reverse=True)
+
+    click.echo(f"create_app() took {elapsed * 1000:.1f} ms (including imports)")
+    click.echo(f"{'cumulative ms':>14} {'self ms':>9}  module")
+
+    for cumulative_us, self_us, module in rows[:top]:
+        click.echo(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
+
+
+def init_app(app):
+    app.cli.add_command(profile_imports_command)
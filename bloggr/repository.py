@@ -0,0 +1,412 @@
+import functools
+import os
+import sqlite3
+import threading
+
+from flask import current_app, g
+
+from bloggr.db import close_db, get_db
+from bloggr.events import EventBroker
+
+# The views talk to these repositories instead of a raw sqlite3 connection,
+# so the same SQL can run against SQLite or a pooled PostgreSQL server.
+# Queries are written with "?" placeholders and a quoted "user" table name,
+# which both engines accept once the backend has prepared the SQL.
+
+
+class IntegrityError(Exception):
+    """A UNIQUE or FOREIGN KEY constraint failed, whatever the backend."""
+
+
+class SQLiteBackend:
+    integrity_errors = (sqlite3.IntegrityError,)
+
+    def prepare(self, sql):
+        return sql
+
+    def connection(self):
+        return get_db()
+
+    def executescript(self, script):
+        get_db().executescript(script)
+
+    # every event has txid 0: with one writer at a time seqs commit in order
+    snapshot_xmin = "1"
+
+    def release(self, e=None):
+        close_db(e)
+
+
+class PostgresBackend:
+    # the oldest transaction still running, see _EVENTS_AFTER
+    snapshot_xmin = "pg_snapshot_xmin(pg_current_snapshot())"
+
+    def __init__(self, make_pool, integrity_errors):
+        self.make_pool = make_pool
+        self.integrity_errors = integrity_errors
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        # One pool per process, opened on first use. A worker forked from a
+        # gunicorn --preload master must not share the master's sockets. An
+        # inherited pool is kept but never used: dropping it would close
+        # connections that still belong to the parent.
+        pid = os.getpid()
+
+        if pid not in self._pools:
+            with self._pools_lock:
+                if pid not in self._pools:
+                    self._pools[pid] = self.make_pool()
+
+        return self._pools[pid]
+
+    @classmethod
+    def connect(cls, url, minconn, maxconn):
+        try:
+            import psycopg2
+            import psycopg2.extras
+            import psycopg2.pool
+        except ImportError:
+            raise RuntimeError(
+                "The postgresql backend needs psycopg2, install bloggr[postgresql]."
+            )
+
+        make_pool = functools.partial(
+            psycopg2.pool.ThreadedConnectionPool,
+            minconn, maxconn, url,
+            cursor_factory=psycopg2.extras.RealDictCursor,
+        )
+        return cls(make_pool, (psycopg2.IntegrityError,))
+
+    def prepare(self, sql):
+        # psycopg2 reads every % as a format marker, so double the literal
+        # ones, and only turn ? into %s outside of '...' string literals
+        parts = sql.replace("%", "%%").split("'")
+        parts[::2] = [part.replace("?", "%s") for part in parts[::2]]
+        return "'".join(parts)
+
+    def connection(self):
+        if "pg_db" not in g:
+            g.pg_db = self.pool.getconn()
+
+        return g.pg_db
+
+    def executescript(self, script):
+        db = self.connection()
+        db.cursor().execute(script)
+        db.commit()
+
+    def release(self, e=None):
+        db = g.pop("pg_db", None)
+
+        if db is not None:
+            db.rollback()                   # never hand back a connection mid-transaction
+            self.pool.putconn(db)
+
+
+class Repository:
+    def __init__(self, backend, broker):
+        self.backend = backend
+        self.broker = broker
+
+    def _execute(self, sql, params=()):
+        db = self.backend.connection()
+        cursor = db.cursor()
+
+        try:
+            cursor.execute(self.backend.prepare(sql), params)
+        except self.backend.integrity_errors as e:
+            db.rollback()
+            raise IntegrityError(str(e)) from e
+
+        return cursor
+
+    def _executemany(self, sql, rows):
+        self.backend.connection().cursor().executemany(
+            self.backend.prepare(sql), rows
+        )
+
+    def _fetchone(self, sql, params=()):
+        return self._execute(sql, params).fetchone()
+
+    def _fetchall(self, sql, params=()):
+        return self._execute(sql, params).fetchall()
+
+    def _commit(self, event_seq=None):
+        self.backend.connection().commit()
+
+        if event_seq is not None:
+            self.broker.publish(event_seq)
+
+    def _append_event(self, kind, post_id, user_id):
+        # written in the caller's transaction, so it commits with the change
+        return self._fetchone(
+            "INSERT INTO event (kind, post_id, user_id) VALUES (?, ?, ?) RETURNING seq",
+            (kind, post_id, user_id),
+        )["seq"]
+
+
+    def _last_event_seq(self):
+        row = self._fetchone(
+            f"""
+                SELECT seq FROM event
+                WHERE txid < {self.backend.snapshot_xmin}
+                ORDER BY txid DESC, seq DESC
+                LIMIT 1
+            """
+        )
+        return 0 if row is None else row["seq"]
+
+
+# Events are read in (txid, seq) order, and only from transactions older
+# than the oldest one still running. A PostgreSQL sequence hands out seqs
+# before commit, so seq 10 can commit after seq 11, and a reader going by
+# seq alone would move past it. Nothing can commit below the snapshot's
+# xmin any more, so this order only ever grows at the end, without making
+# writers wait for each other. A seq of 0 is the start of the log.
+_EVENTS_AFTER = "(? = 0 OR (txid, seq) > (SELECT txid, seq FROM event WHERE seq = ?))"
+_EVENTS_UP_TO = "(txid, seq) <= (SELECT txid, seq FROM event WHERE seq = ?)"
+
+
+class UserRepository(Repository):
+    def get(self, id):
+        return self._fetchone('SELECT * FROM "user" WHERE id = ?', (id,))
+
+    def get_by_email(self, email):
+        return self._fetchone('SELECT * FROM "user" WHERE email = ?', (email,))
+
+    def get_by_login(self, username_or_email):
+        return self._fetchone(
+            'SELECT * FROM "user" WHERE username = ? OR email = ?',
+            (username_or_email, username_or_email),
+        )
+
+    def create(self, username, email, password_hash):
+        self._execute(
+            'INSERT INTO "user" (username, email, password) VALUES (?, ?, ?)',
+            (username, email, password_hash),
+        )
+        self._commit()
+
+    def set_password(self, id, password_hash):
+        self._execute('UPDATE "user" SET password = ? WHERE id = ?', (password_hash, id))
+        self._commit()
+
+    def set_password_by_email(self, email, password_hash):
+        self._execute('UPDATE "user" SET password = ? WHERE email = ?', (password_hash, email))
+        self._commit()
+
+
+class PostRepository(Repository):
+    def list(self):
+        return self._fetchall(
+            """
+                SELECT p.id, title, body, created, author_id, username
+                FROM post p JOIN "user" u ON p.author_id = u.id
+                ORDER BY created DESC
+            """
+        )
+
+    def get(self, id):
+        return self._fetchone(
+            """
+                SELECT p.id, title, body, created, author_id, username
+                FROM post p JOIN "user" u ON p.author_id = u.id
+                WHERE p.id = ?
+            """,
+            (id,),
+        )
+
+    def create(self, title, body, author_id):
+        id = self._fetchone(
+            "INSERT INTO post (title, body, author_id) VALUES (?, ?, ?) RETURNING id",
+            (title, body, author_id),
+        )["id"]
+        self._commit(self._append_event("post_created", id, author_id))
+        return id
+
+    def update(self, id, title, body, user_id=None):
+        self._execute("UPDATE post SET title = ?, body = ? WHERE id = ?", (title, body, id))
+        self._commit(self._append_event("post_updated", id, user_id))
+
+    def delete(self, id, user_id=None):
+        self._execute("DELETE FROM post WHERE id = ?", (id,))
+        self._commit(self._append_event("post_deleted", id, user_id))
+
+
+class LikeRepository(Repository):
+    def exists(self, post_id, user_id):
+        return self._fetchone(
+            "SELECT id FROM post_likes WHERE post_id = ? AND user_id = ?",
+            (post_id, user_id),
+        ) is not None
+
+    def add(self, post_id, user_id):
+        # a double-submitted like is a no-op rather than an IntegrityError
+        cursor = self._execute(
+            """
+                INSERT INTO post_likes (post_id, user_id) VALUES (?, ?)
+                ON CONFLICT (user_id, post_id) DO NOTHING
+            """,
+            (post_id, user_id),
+        )
+        event_seq = None
+        if cursor.rowcount:
+            event_seq = self._append_event("post_liked", post_id, user_id)
+        self._commit(event_seq)
+
+    def remove(self, post_id, user_id):
+        cursor = self._execute(
+            "DELETE FROM post_likes WHERE post_id = ? AND user_id = ?",
+            (post_id, user_id),
+        )
+        event_seq = None
+        if cursor.rowcount:
+            event_seq = self._append_event("post_unliked", post_id, user_id)
+        self._commit(event_seq)
+
+
+class EventRepository(Repository):
+    def exists(self, seq):
+        return self._fetchone("SELECT seq FROM event WHERE seq = ?", (seq,)) is not None
+
+    def since(self, seq, limit):
+        return self._fetchall(
+            f"""
+                SELECT seq, kind, post_id, user_id, created
+                FROM event
+                WHERE txid < {self.backend.snapshot_xmin} AND {_EVENTS_AFTER}
+                ORDER BY txid, seq
+                LIMIT ?
+            """,
+            (seq, seq, limit),
+        )
+
+    def last_seq(self):
+        return self._last_event_seq()
+
+
+class PopularRepository(Repository):
+    def list(self, limit):
+        # one range read down the post_rank_score index
+        return self._fetchall(
+            """
+                SELECT p.id, title, body, created, author_id, username, r.likes
+                FROM post_rank r
+                JOIN post p ON p.id = r.post_id
+                JOIN "user" u ON p.author_id = u.id
+                ORDER BY r.score DESC
+                LIMIT ?
+            """,
+            (limit,),
+        )
+
+    def refresh(self, score, full=False):
+        """Rescore the posts that have events (created, liked, unliked, ...)
+        since the last run, or every post when full is set or the ranking
+        was never built. score(likes, created) gives the rank value.
+        Returns the number of posts rescored or dropped from the ranking."""
+        last_seq = self._fetchone(
+            "SELECT last_seq FROM rank_watermark WHERE id = 1"
+        )["last_seq"]
+        full = full or last_seq is None
+        if full:
+            self._execute("DELETE FROM post_rank")
+            last_seq = 0
+
+        # bound this run so events committed meanwhile are left for the next one
+        max_seq = self._last_event_seq()
+
+        posts = self._fetchall(
+            f"""
+                SELECT p.id, p.created, COUNT(l.id) AS likes
+                FROM post p LEFT JOIN post_likes l ON l.post_id = p.id
+                WHERE ? OR p.id IN (
+                    SELECT post_id FROM event WHERE {_EVENTS_AFTER} AND {_EVENTS_UP_TO}
+                )
+                GROUP BY p.id, p.created
+            """,
+            (full, last_seq, last_seq, max_seq),
+        )
+
+        self._executemany(
+            """
+                INSERT INTO post_rank (post_id, likes, score) VALUES (?, ?, ?)
+                ON CONFLICT (post_id) DO UPDATE
+                SET likes = excluded.likes, score = excluded.score
+            """,
+            [
+                (post["id"], post["likes"], score(post["likes"], post["created"]))
+                for post in posts
+            ],
+        )
+        dropped = self._execute(
+            f"""
+                DELETE FROM post_rank WHERE post_id IN (
+                    SELECT post_id FROM event
+                    WHERE kind = 'post_deleted' AND {_EVENTS_AFTER} AND {_EVENTS_UP_TO}
+                )
+            """,
+            (last_seq, last_seq, max_seq),
+        ).rowcount
+        self._execute(
+            "UPDATE rank_watermark SET last_seq = ? WHERE id = 1", (max_seq,)
+        )
+        self._commit()
+
+        return len(posts) + dropped
+
+
+class Repositories:
+    def __init__(self, backend):
+        self.backend = backend
+        self.broker = EventBroker()
+        self.users = UserRepository(backend, self.broker)
+        self.posts = PostRepository(backend, self.broker)
+        self.likes = LikeRepository(backend, self.broker)
+        self.popular = PopularRepository(backend, self.broker)
+        self.events = EventRepository(backend, self.broker)
+
+
+_lock = threading.Lock()
+
+
+def create_backend(config):
+    name = config["DATABASE_BACKEND"]
+
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "postgresql":
+        return PostgresBackend.connect(
+            config["DATABASE_URL"],
+            config["DATABASE_POOL_MIN"],
+            config["DATABASE_POOL_MAX"],
+        )
+
+    raise ValueError(f"Unknown DATABASE_BACKEND {name!r}.")
+
+
+def get_repository():
+    app = current_app._get_current_object()
+
+    if "bloggr.repository" not in app.extensions:
+        with _lock:                         # the pool must only be created once per app
+            if "bloggr.repository" not in app.extensions:
+                app.extensions["bloggr.repository"] = Repositories(
+                    create_backend(app.config)
+                )
+
+    return app.extensions["bloggr.repository"]
+
+
+def release_connection(e=None):
+    repository = current_app.extensions.get("bloggr.repository")
+
+    if repository is not None:
+        repository.backend.release(e)
+
+
+def init_app(app):
+    app.teardown_appcontext(release_connection)
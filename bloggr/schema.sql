@@ -1,3 +1,10 @@
+PRAGMA auto_vacuum = INCREMENTAL;
+PRAGMA journal_mode = WAL;
+
+DROP TABLE IF EXISTS event;
+DROP TABLE IF EXISTS rank_watermark;
+DROP TABLE IF EXISTS post_rank;
+DROP TABLE IF EXISTS post_likes;
 DROP TABLE IF EXISTS user;
 DROP TABLE IF EXISTS post;
 
@@ -25,4 +32,6 @@ CREATE TABLE post_likes (
   FOREIGN KEY (user_id) REFERENCES user (id) ON DELETE CASCADE,
   FOREIGN KEY (post_id) REFERENCES post (id) ON DELETE CASCADE,
   UNIQUE (user_id, post_id)
-);
\ No newline at end of file
+);
+
+-- tables added later live in upgrade.sql, which init-db runs after this
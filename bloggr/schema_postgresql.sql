@@ -0,0 +1,34 @@
+DROP TABLE IF EXISTS event;
+DROP TABLE IF EXISTS rank_watermark;
+DROP TABLE IF EXISTS post_rank;
+DROP TABLE IF EXISTS post_likes;
+DROP TABLE IF EXISTS post;
+DROP TABLE IF EXISTS "user";
+
+CREATE TABLE "user" (
+  id SERIAL PRIMARY KEY,
+  username TEXT UNIQUE NOT NULL,
+  email TEXT UNIQUE NOT NULL,
+  password TEXT NOT NULL
+);
+
+CREATE TABLE post (
+  id SERIAL PRIMARY KEY,
+  author_id INTEGER NOT NULL,
+  created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  title TEXT NOT NULL,
+  body TEXT NOT NULL,
+  FOREIGN KEY (author_id) REFERENCES "user" (id)
+);
+
+CREATE TABLE post_likes (
+  id SERIAL PRIMARY KEY,
+  user_id INTEGER NOT NULL,
+  post_id INTEGER NOT NULL,
+  created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (user_id) REFERENCES "user" (id) ON DELETE CASCADE,
+  FOREIGN KEY (post_id) REFERENCES post (id) ON DELETE CASCADE,
+  UNIQUE (user_id, post_id)
+);
+
+-- tables added later live in upgrade_postgresql.sql, which init-db runs after this
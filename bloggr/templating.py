@@ -0,0 +1,78 @@
+import os
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache
+
+
+class CountingBytecodeCache(FileSystemBytecodeCache):
+    """On-disk bytecode cache shared by every worker, counting how many
+    templates were loaded from it and how many had to be compiled."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+
+        if bucket.code is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    def clear_stats(self):
+        self.hits = self.misses = 0
+
+
+def get_bytecode_cache(app=None):
+    app = app or current_app
+    return app.extensions.get("bloggr.jinja_cache")
+
+
+templates_cli = AppGroup("templates", help="Template cache commands.")
+
+
+@templates_cli.command("compile")
+@click.option("--force", is_flag=True, help="Drop the existing cache first.")
+def compile_command(force):
+    """Compile every template into the bytecode cache."""
+    cache = get_bytecode_cache()
+
+    if cache is None:
+        raise click.ClickException("JINJA_BYTECODE_CACHE is not configured.")
+
+    env = current_app.jinja_env
+
+    if force:
+        cache.clear()
+        if env.cache is not None:
+            env.cache.clear()
+    cache.clear_stats()
+
+    names = env.list_templates()
+    start = time.perf_counter()
+
+    for name in names:
+        env.get_template(name)
+
+    click.echo(
+        f"Compiled {len(names)} template(s) in {(time.perf_counter() - start) * 1000:.1f} ms: "
+        f"{cache.hits} cache hit(s), {cache.misses} miss(es)."
+    )
+
+
+def init_app(app):
+    directory = app.config["JINJA_BYTECODE_CACHE"]
+
+    if directory:
+        cache = CountingBytecodeCache(directory)
+        app.extensions["bloggr.jinja_cache"] = cache
+        # jinja_options is read when app.jinja_env is first created
+        app.jinja_options = {**app.jinja_options, "bytecode_cache": cache}
+
+    app.cli.add_command(templates_cli)
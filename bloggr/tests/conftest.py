@@ -1,5 +1,5 @@
 import os
-import tempfile
+import sqlite3
 
 import pytest
 from bloggr import create_app
@@ -8,23 +8,47 @@ from bloggr.db import get_db, init_db
 with open(os.path.join(os.path.dirname(__file__), "data.sql"), "rb") as f:
     _data_sql = f.read().decode("utf8")
 
-@pytest.fixture
-def app():
-    db_fd, db_path = tempfile.mkstemp()
+# tmp_path_factory gives every pytest-xdist worker its own base directory,
+# so the template and the per-test copies never clash between processes.
 
-    app = create_app({
+@pytest.fixture(scope="session")
+def test_config(tmp_path_factory):
+    return {
         "TESTING": True,
-        "DATABASE": db_path,
-    })
+        "JINJA_BYTECODE_CACHE": str(tmp_path_factory.mktemp("jinja_cache")),
+    }
+
+
+@pytest.fixture(scope="session")
+def template_db(tmp_path_factory, test_config):
+    """The schema plus data.sql, built once per test process."""
+    db_path = tmp_path_factory.mktemp("template") / "BLOGGR.sqlite"
+    app = create_app({**test_config, "DATABASE": str(db_path)})
 
     with app.app_context():
         init_db()
         get_db().executescript(_data_sql)
 
-    yield app
+    return db_path
+
+
+def clone_db(source, dest):
+    source = sqlite3.connect(source)
+    target = sqlite3.connect(dest)
+
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+@pytest.fixture
+def app(template_db, test_config, tmp_path):
+    db_path = tmp_path / "BLOGGR.sqlite"
+    clone_db(template_db, db_path)
 
-    os.close(db_fd)
-    os.unlink(db_path)
+    yield create_app({**test_config, "DATABASE": str(db_path)})
 
 
 @pytest.fixture
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+from bloggr.repository import get_repository
+
+
+def test_events_start_position(client):
+    response = client.get("/api/events")
+    assert response.json == {"events": [], "last_seq": 0}
+
+
+def test_events_since(app, client):
+    with app.app_context():
+        posts = get_repository().posts
+        id = posts.create("new", "body", 1)
+        posts.update(id, "newer", "body", 1)
+        get_repository().likes.add(id, 2)
+        get_repository().likes.remove(id, 2)
+        get_repository().likes.remove(id, 2)
+        posts.delete(id, 1)
+
+    response = client.get("/api/events?since=0")
+    assert [event["kind"] for event in response.json["events"]] == [
+        "post_created", "post_updated", "post_liked", "post_unliked", "post_deleted",
+    ]
+    assert response.json["events"][2]["user_id"] == 2
+    assert response.json["last_seq"] == 5
+
+    response = client.get("/api/events?since=3")
+    assert [event["seq"] for event in response.json["events"]] == [4, 5]
+
+
+def test_events_since_unknown(app, client):
+    with app.app_context():
+        get_repository().posts.create("new", "body", 1)
+
+    # a position from before a re-init resyncs right away instead of waiting
+    start = time.monotonic()
+    response = client.get("/api/events?since=50&timeout=5")
+    assert response.json == {"events": [], "last_seq": 1}
+    assert time.monotonic() - start < 5
+
+
+def test_events_timeout(client):
+    start = time.monotonic()
+    response = client.get("/api/events?since=0&timeout=0.2")
+    assert response.json == {"events": [], "last_seq": 0}
+    assert time.monotonic() - start >= 0.2
+
+
+@pytest.mark.parametrize("timeout", ("nan", "inf", "-inf"))
+def test_events_timeout_not_finite(app, client, timeout):
+    app.config["EVENTS_MAX_WAIT"] = 0.2
+    start = time.monotonic()
+    response = client.get(f"/api/events?since=0&timeout={timeout}")
+    assert response.json == {"events": [], "last_seq": 0}
+    assert time.monotonic() - start < 5
+
+
+def test_events_long_poll_wakes_up(app, client):
+    app.config["EVENTS_POLL_INTERVAL"] = 30
+
+    def create_post():
+        time.sleep(0.2)
+        with app.app_context():
+            get_repository().posts.create("new", "body", 1)
+
+    thread = threading.Thread(target=create_post)
+    thread.start()
+    start = time.monotonic()
+    response = client.get("/api/events?since=0&timeout=10")
+    thread.join()
+
+    assert time.monotonic() - start < 5
+    assert response.json["events"][0]["kind"] == "post_created"
@@ -0,0 +1,87 @@
+import gzip
+import shutil
+
+import pytest
+
+
+@pytest.fixture
+def static_folder(tmp_path):
+    static_folder = tmp_path / "static"
+    static_folder.mkdir()
+    return static_folder
+
+
+@pytest.fixture
+def static_app(app, static_folder):
+    shutil.copy(f"{app.static_folder}/style.css", static_folder / "style.css")
+    app.static_folder = str(static_folder)
+    return app
+
+
+def test_build_assets_command(static_app, runner, static_folder):
+    result = runner.invoke(args=["build-assets"])
+    assert "Built 1 static asset(s)." in result.output
+
+    built = static_app.extensions["bloggr_assets"]["paths"]["style.css"]
+    assert built.startswith("dist/style.") and built.endswith(".css")
+    assert (static_folder / built).exists()
+    assert (static_folder / (built + ".gz")).exists()
+
+
+def test_fingerprinted_static(static_app, runner, client):
+    runner.invoke(args=["build-assets"])
+    built = static_app.extensions["bloggr_assets"]["paths"]["style.css"]
+
+    response = client.get("/")
+    assert f"/static/{built}".encode() in response.data
+
+    response = client.get(f"/static/{built}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.mimetype == "text/css"
+    assert "immutable" in response.headers["Cache-Control"]
+    assert gzip.decompress(response.data).startswith(b"html {")
+
+    response = client.get(f"/static/{built}")
+    assert "Content-Encoding" not in response.headers
+    assert response.data.startswith(b"html {")
+
+    response = client.get(f"/static/{built}", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in response.headers
+    assert response.data.startswith(b"html {")
+
+
+def test_brotli_static(static_app, runner, client):
+    brotli = pytest.importorskip("brotli")
+    runner.invoke(args=["build-assets"])
+    built = static_app.extensions["bloggr_assets"]["paths"]["style.css"]
+    assert static_app.extensions["bloggr_assets"]["encodings"][built] == ["br", "gzip"]
+
+    response = client.get(f"/static/{built}", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.mimetype == "text/css"
+    assert brotli.decompress(response.data).startswith(b"html {")
+
+    response = client.get(f"/static/{built}", headers={"Accept-Encoding": "gzip, br;q=0"})
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+def test_compress_response(app, client):
+    response = client.get("/auth/login", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert b"Log In" in gzip.decompress(response.data)
+
+    response = client.get("/auth/login")
+    assert "Content-Encoding" not in response.headers
+    assert b"Log In" in response.data
+
+
+def test_compress_response_refused_encoding(app, client):
+    response = client.get("/auth/login", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in response.headers
+    assert b"Log In" in response.data
+
+
+def test_compress_response_min_size(app, client):
+    app.config["COMPRESS_MIN_SIZE"] = 1 << 20
+    response = client.get("/auth/login", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
@@ -1,5 +1,6 @@
 import pytest
 from bloggr.db import get_db
+from bloggr.repository import get_repository
 
 
 def test_index(client, auth):
@@ -56,3 +57,57 @@ def test_delete(client, auth, app):
         post = db.execute("SELECT * FROM post WHERE id = 1").fetchone()
         assert post is None
 
+
+
+def test_popular(app, client, runner):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO post (title, body, author_id, created)"
+            " VALUES ('liked title', 'body', 2, '2026-01-01 00:00:00')"
+        )
+        db.execute("INSERT INTO post_likes (user_id, post_id) VALUES (1, 2), (2, 2)")
+        db.commit()
+
+    assert b"Nothing is popular yet." in client.get("/popular").data
+
+    result = runner.invoke(args=["refresh-popular"])
+    assert "Rescored 2 post(s)." in result.output
+
+    response = client.get("/popular")
+    assert response.data.index(b"liked title") < response.data.index(b"test title")
+    assert b"2 likes" in response.data
+
+
+def test_popular_incremental_refresh(app, runner):
+    def ranked_likes():
+        with app.app_context():
+            return dict(get_db().execute("SELECT post_id, likes FROM post_rank"))
+
+    runner.invoke(args=["refresh-popular"])
+
+    with app.app_context():
+        get_repository().likes.add(1, 1)
+        get_repository().likes.add(1, 2)
+
+    result = runner.invoke(args=["refresh-popular"])
+    assert "Rescored 1 post(s)." in result.output
+    result = runner.invoke(args=["refresh-popular"])
+    assert "Rescored 0 post(s)." in result.output
+    assert ranked_likes() == {1: 2}
+
+    # unlikes are picked up without --full
+    with app.app_context():
+        get_repository().likes.remove(1, 1)
+        get_repository().likes.remove(1, 2)
+
+    result = runner.invoke(args=["refresh-popular"])
+    assert "Rescored 1 post(s)." in result.output
+    assert ranked_likes() == {1: 0}
+
+    with app.app_context():
+        get_repository().posts.delete(1, 1)
+
+    result = runner.invoke(args=["refresh-popular"])
+    assert "Rescored 1 post(s)." in result.output
+    assert ranked_likes() == {}
@@ -1,7 +1,7 @@
 import sqlite3
 
 import pytest
-from bloggr.db import get_db
+from bloggr.db import backup_db, get_db
 
 def test_get_close_db(app):
     with app.app_context():
@@ -26,3 +26,107 @@ def test_init_db_command(runner, monkeypatch):
     assert "Initialized" in result.output
     assert Reorder.called
 
+
+
+def test_upgrade_command(app, runner):
+    # a database initialized before the ranking and event tables existed
+    with app.app_context():
+        db = get_db()
+        db.executescript(
+            "DROP TABLE post_rank; DROP TABLE rank_watermark; DROP TABLE event;"
+        )
+
+    result = runner.invoke(args=["db", "upgrade"])
+    assert "Upgraded" in result.output
+
+    result = runner.invoke(args=["refresh-popular"])
+    assert "Rescored 1 post(s)" in result.output
+
+    with app.app_context():
+        db = get_db()
+        assert db.execute("SELECT title FROM post").fetchone()[0] == "test title"
+        assert db.execute("SELECT post_id FROM post_rank").fetchone()[0] == 1
+        assert db.execute("SELECT COUNT(*) FROM event").fetchone()[0] == 0
+
+    # running it again changes nothing
+    result = runner.invoke(args=["db", "upgrade"])
+    assert "Upgraded" in result.output
+
+
+def test_maintain_command(app, runner):
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            "INSERT INTO post (title, body, author_id) VALUES (?, ?, 1)",
+            [("bulk", "x" * 4000)] * 50,
+        )
+        db.commit()
+        db.execute("DELETE FROM post WHERE title = 'bulk'")
+        db.commit()
+        assert db.execute("PRAGMA freelist_count").fetchone()[0] > 0
+
+    result = runner.invoke(args=["db", "maintain", "--analyze", "--checkpoint", "truncate"])
+    assert "Freed" in result.output
+    assert "Freed 0 page(s)" not in result.output
+
+    with app.app_context():
+        assert get_db().execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+def test_maintain_enables_incremental_vacuum(app, runner):
+    with app.app_context():
+        db = get_db()
+        db.execute("PRAGMA auto_vacuum = NONE")
+        db.execute("VACUUM")
+        assert db.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+    result = runner.invoke(args=["db", "maintain"])
+    assert "Incremental vacuum is off" in result.output
+
+    result = runner.invoke(args=["db", "maintain", "--full-vacuum"])
+    assert "Incremental vacuum is off" not in result.output
+
+    with app.app_context():
+        assert get_db().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_backup_command(runner, tmp_path):
+    dest = tmp_path / "backup.sqlite"
+    result = runner.invoke(args=["db", "backup", str(dest), "--pages", "1", "--delay", "0"])
+    assert "Backed up" in result.output
+
+    backup = sqlite3.connect(dest)
+    assert backup.execute("SELECT title FROM post").fetchone() == ("test title",)
+    backup.close()
+
+
+def test_backup_during_writes(app, tmp_path):
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            "INSERT INTO post (title, body, author_id) VALUES (?, ?, 1)",
+            [("bulk", "x" * 4000)] * 50,
+        )
+        db.commit()
+
+        writer = sqlite3.connect(app.config["DATABASE"])
+        steps = []
+
+        def progress(remaining, total):
+            # a write between every step used to restart the copy from page 1
+            steps.append(remaining)
+            assert len(steps) < 1000, "backup never finished"
+            writer.execute(
+                "INSERT INTO post (title, body, author_id) VALUES ('during', '', 1)"
+            )
+            writer.commit()
+
+        backup_db(tmp_path / "backup.sqlite", pages=4, delay=0, progress=progress)
+        writer.close()
+
+    assert steps == sorted(steps, reverse=True)
+
+    # the copy is the snapshot from when the backup started
+    backup = sqlite3.connect(tmp_path / "backup.sqlite")
+    assert backup.execute("SELECT COUNT(*) FROM post").fetchone() == (51,)
+    backup.close()
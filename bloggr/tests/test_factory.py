@@ -8,4 +8,40 @@ def test_config():
 
 def test_hello(client):
     response = client.get("/hello")
-    assert response.data == b'Hello, to the World!'
\ No newline at end of file
+    assert response.data == b'Hello, to the World!'
+
+def test_lazy_extensions():
+    app = create_app({"TESTING": True})
+    assert "mail" not in app.extensions
+    assert "bloggr.google" not in app.extensions
+
+    with app.app_context():
+        from bloggr.extensions import get_mail
+        assert get_mail() is app.extensions["mail"]
+
+    app = create_app({"TESTING": True, "LAZY_EXTENSIONS": False})
+    assert "mail" in app.extensions
+    assert "bloggr.google" in app.extensions
+
+
+def test_profile_imports_command(runner):
+    result = runner.invoke(args=["profile-imports", "--top", "5"])
+    assert "create_app() took" in result.output
+    assert "bloggr" in result.output
+
+
+def test_warmup(app):
+    app.config["WARMUP_PATHS"] = ["/", "/auth/login"]
+    from bloggr.warmup import warmup
+
+    timings = warmup(app, replay=True)
+    assert timings["templates"][0] == len(app.jinja_env.list_templates())
+    assert timings["database"][0] == 3
+    assert timings["requests"][0] == 2
+    assert "blog/index.html" in [t.name for t in app.jinja_env.cache.values()]
+
+
+def test_warmup_command(runner):
+    result = runner.invoke(args=["warmup", "--no-replay"])
+    assert "templates" in result.output
+    assert "requests" not in result.output
@@ -0,0 +1,242 @@
+import os
+import sqlite3
+
+import pytest
+from bloggr import create_app
+from bloggr.db import get_db, init_db
+from bloggr.repository import (
+    IntegrityError,
+    PostgresBackend,
+    Repositories,
+    create_backend,
+    get_repository,
+)
+from bloggr.warmup import warmup
+
+
+def test_get_repository(app):
+    with app.app_context():
+        repository = get_repository()
+        assert repository is get_repository()
+        assert repository.users.get(1)["username"] == "test"
+        assert repository.users.get_by_login("other")["id"] == 2
+
+
+def test_users(app):
+    with app.app_context():
+        users = get_repository().users
+        users.create("new", "new@example.com", "hash")
+        assert users.get_by_email("new@example.com")["username"] == "new"
+
+        with pytest.raises(IntegrityError):
+            users.create("test", "elsewhere@example.com", "hash")
+
+        users.set_password_by_email("new@example.com", "changed")
+        assert get_db().execute(
+            "SELECT password FROM user WHERE username = 'new'"
+        ).fetchone()[0] == "changed"
+
+
+def test_posts_and_likes(app):
+    with app.app_context():
+        repository = get_repository()
+        repository.posts.create("second", "body", 2)
+        posts = repository.posts.list()
+        assert [post["title"] for post in posts] == ["second", "test title"]
+
+        assert not repository.likes.exists(1, 2)
+        repository.likes.add(1, 2)
+        assert repository.likes.exists(1, 2)
+        repository.likes.add(1, 2)              # a double submit is ignored
+        assert repository.events.last_seq() == 2
+        repository.likes.remove(1, 2)
+        assert not repository.likes.exists(1, 2)
+
+        repository.posts.delete(1)
+        assert repository.posts.get(1) is None
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_backend({"DATABASE_BACKEND": "mysql"})
+
+
+class FakePgCursor(object):
+    """Runs psycopg2-style SQL on SQLite and returns dict rows like
+    RealDictCursor, so the PostgreSQL backend can be tested without a server."""
+
+    def __init__(self, db):
+        self._cursor = db.cursor()
+
+    def _sql(self, sql):
+        assert "?" not in sql.replace("'?'", "")
+        return sql.replace("%s", "?").replace("%%", "%")
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(self._sql(sql), params)
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(self._sql(sql), rows)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else dict(row)
+
+    def fetchall(self):
+        return [dict(row) for row in self._cursor.fetchall()]
+
+
+class FakePgConnection(object):
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+        self.db.row_factory = sqlite3.Row
+        self.xmin = 1                       # oldest running transaction
+        self.db.create_function("pg_current_snapshot", 0, lambda: None)
+        self.db.create_function("pg_snapshot_xmin", 1, lambda snapshot: self.xmin)
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakePgCursor(self.db)
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.db.rollback()
+
+
+class FakePool(object):
+    def __init__(self, path):
+        self.idle = [FakePgConnection(path)]
+        self.busy = []
+
+    def getconn(self):
+        connection = self.idle.pop()
+        self.busy.append(connection)
+        return connection
+
+    def putconn(self, connection):
+        self.busy.remove(connection)
+        self.idle.append(connection)
+
+
+@pytest.fixture
+def pg_pool(app):
+    pool = FakePool(app.config["DATABASE"])
+    app.extensions["bloggr.repository"] = Repositories(
+        PostgresBackend(lambda: pool, (sqlite3.IntegrityError,))
+    )
+    return pool
+
+
+def test_postgres_prepare():
+    backend = PostgresBackend(None, ())
+    assert backend.prepare(
+        "SELECT '?', '100%' FROM t WHERE a = ? AND b LIKE 'it''s%' AND c = ?"
+    ) == "SELECT '?', '100%%' FROM t WHERE a = %s AND b LIKE 'it''s%%' AND c = %s"
+
+
+def test_postgres_pool_per_request(app, client, pg_pool):
+    response = client.get("/")
+    assert b"test title" in response.data
+
+    # the connection went back to the pool, rolled back, at teardown
+    assert pg_pool.busy == []
+    assert pg_pool.idle[0].rollbacks == 1
+
+
+def test_postgres_rows_and_errors(app, pg_pool):
+    with app.app_context():
+        repository = get_repository()
+        assert repository.users.get_by_login("test@example.com")["username"] == "test"
+        assert repository.posts.get(1)["created"].year == 2026
+
+        with pytest.raises(IntegrityError):
+            repository.users.create("test", "new@example.com", "hash")
+        assert pg_pool.busy[0].rollbacks == 1
+
+    assert pg_pool.busy == []
+
+
+def test_postgres_pool_per_process(app, monkeypatch):
+    pools = []
+
+    def make_pool():
+        pools.append(FakePool(app.config["DATABASE"]))
+        return pools[-1]
+
+    backend = PostgresBackend(make_pool, (sqlite3.IntegrityError,))
+    app.extensions["bloggr.repository"] = Repositories(backend)
+    app.config["DATABASE_BACKEND"] = "postgresql"
+
+    # a gunicorn --preload master warms up without opening the pool
+    warmup(app)
+    assert pools == []
+
+    # every forked worker opens its own from post_fork
+    monkeypatch.setattr(os, "getpid", lambda: 1001)
+    warmup(app, connect=True)
+    monkeypatch.setattr(os, "getpid", lambda: 1002)
+    warmup(app, connect=True)
+    assert len(pools) == 2
+    assert backend.pool is pools[1]
+
+
+def test_postgres_events_commit_out_of_order(app, pg_pool):
+    connection = pg_pool.idle[0]
+
+    def commit_event(seq, txid):
+        connection.db.execute(
+            "INSERT INTO event (seq, kind, post_id, txid) VALUES (?, 'post_liked', 1, ?)",
+            (seq, txid),
+        )
+        connection.db.commit()
+
+    # transaction 12 took seq 1 and committed, 11 took seq 2 and still runs
+    commit_event(1, 12)
+    connection.xmin = 11
+
+    with app.app_context():
+        events = get_repository().events
+        assert events.since(0, 10) == []
+        assert events.last_seq() == 0
+
+    commit_event(2, 11)
+    connection.xmin = 13
+
+    with app.app_context():
+        assert [event["seq"] for event in events.since(0, 10)] == [2, 1]
+        assert [event["seq"] for event in events.since(2, 10)] == [1]
+        assert events.since(1, 10) == []
+        assert events.last_seq() == 1
+
+
+@pytest.mark.skipif(
+    not os.environ.get("DATABASE_URL"), reason="needs a PostgreSQL DATABASE_URL"
+)
+def test_postgres_server(test_config):
+    pytest.importorskip("psycopg2")
+    app = create_app({
+        **test_config,
+        "DATABASE_BACKEND": "postgresql",
+        "DATABASE_URL": os.environ["DATABASE_URL"],
+    })
+
+    with app.app_context():
+        init_db()
+        repository = get_repository()
+        repository.users.create("pg", "pg@example.com", "hash")
+        author_id = repository.users.get_by_email("pg@example.com")["id"]
+        repository.posts.create("100% postgres", "body?", author_id)
+
+        post = repository.posts.list()[0]
+        assert post["title"] == "100% postgres"
+        assert post["body"] == "body?"
+
+        with pytest.raises(IntegrityError):
+            repository.users.create("pg", "other@example.com", "hash")
@@ -0,0 +1,37 @@
+from bloggr import create_app
+from bloggr.templating import get_bytecode_cache
+
+
+def test_templates_compile_command(tmp_path):
+    config = {"TESTING": True, "JINJA_BYTECODE_CACHE": str(tmp_path)}
+    app = create_app(config)
+    count = len(app.jinja_env.list_templates())
+
+    result = app.test_cli_runner().invoke(args=["templates", "compile"])
+    assert f"Compiled {count} template(s)" in result.output
+    assert f"0 cache hit(s), {count} miss(es)" in result.output
+    assert len(list(tmp_path.iterdir())) == count
+
+    # a fresh worker loads everything from the shared cache
+    app = create_app(config)
+    result = app.test_cli_runner().invoke(args=["templates", "compile"])
+    assert f"{count} cache hit(s), 0 miss(es)" in result.output
+
+    result = app.test_cli_runner().invoke(args=["templates", "compile", "--force"])
+    assert f"0 cache hit(s), {count} miss(es)" in result.output
+
+
+def test_render_uses_cache(tmp_path):
+    app = create_app({"TESTING": True, "JINJA_BYTECODE_CACHE": str(tmp_path)})
+    app.test_client().get("/auth/login")
+
+    cache = get_bytecode_cache(app)
+    assert cache.misses == 2                # auth/login.html and base.html
+    assert app.jinja_env.bytecode_cache is cache
+
+
+def test_cache_disabled():
+    app = create_app({"TESTING": True, "JINJA_BYTECODE_CACHE": None})
+    assert get_bytecode_cache(app) is None
+    result = app.test_cli_runner().invoke(args=["templates", "compile"])
+    assert "not configured" in result.output
@@ -0,0 +1,38 @@
+-- Safe to run on a live database: only creates what is missing.
+-- `flask db upgrade` runs this on existing databases, `flask init-db`
+-- runs it after schema.sql.
+
+CREATE INDEX IF NOT EXISTS post_likes_post_id ON post_likes (post_id);
+
+-- materialized "popular" ranking, refreshed by `flask refresh-popular`
+CREATE TABLE IF NOT EXISTS post_rank (
+  post_id INTEGER PRIMARY KEY,
+  likes INTEGER NOT NULL DEFAULT 0,
+  score REAL NOT NULL,
+  FOREIGN KEY (post_id) REFERENCES post (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS post_rank_score ON post_rank (score DESC);
+
+-- last event folded into post_rank, NULL until the first refresh
+-- rebuilds the whole ranking
+CREATE TABLE IF NOT EXISTS rank_watermark (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  last_seq INTEGER
+);
+
+INSERT OR IGNORE INTO rank_watermark (id, last_seq) VALUES (1, NULL);
+
+-- append-only change feed served by /api/events
+CREATE TABLE IF NOT EXISTS event (
+  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+  kind TEXT NOT NULL,
+  post_id INTEGER NOT NULL,
+  user_id INTEGER,
+  created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  -- always 0 here: SQLite has one writer at a time, so seqs commit in
+  -- order (the PostgreSQL schema stores the writing transaction)
+  txid INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS event_txid_seq ON event (txid, seq);
@@ -0,0 +1,35 @@
+-- Safe to run on a live database: only creates what is missing.
+-- `flask db upgrade` runs this on existing databases, `flask init-db`
+-- runs it after schema_postgresql.sql.
+
+CREATE INDEX IF NOT EXISTS post_likes_post_id ON post_likes (post_id);
+
+CREATE TABLE IF NOT EXISTS post_rank (
+  post_id INTEGER PRIMARY KEY,
+  likes INTEGER NOT NULL DEFAULT 0,
+  score DOUBLE PRECISION NOT NULL,
+  FOREIGN KEY (post_id) REFERENCES post (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS post_rank_score ON post_rank (score DESC);
+
+CREATE TABLE IF NOT EXISTS rank_watermark (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  last_seq BIGINT
+);
+
+INSERT INTO rank_watermark (id, last_seq) VALUES (1, NULL)
+  ON CONFLICT (id) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS event (
+  seq BIGSERIAL PRIMARY KEY,
+  kind TEXT NOT NULL,
+  post_id INTEGER NOT NULL,
+  user_id INTEGER,
+  created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  -- readers order by (txid, seq), seqs alone can commit out of order;
+  -- xid8 and pg_current_xact_id() need PostgreSQL 13
+  txid xid8 NOT NULL DEFAULT pg_current_xact_id()
+);
+
+CREATE INDEX IF NOT EXISTS event_txid_seq ON event (txid, seq);
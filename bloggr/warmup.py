@@ -0,0 +1,124 @@
+import sqlite3
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from bloggr.db import get_db
+from bloggr.repository import get_repository
+
+
+def compile_templates(app):
+    names = app.jinja_env.list_templates()
+
+    for name in names:
+        app.jinja_env.get_template(name)
+
+    return len(names)
+
+
+# the last column of each table, so reading it decodes whole rows,
+# overflow pages included
+_PRIME_COLUMNS = {"user": "password", "post": "body", "post_likes": "created"}
+
+
+def prime_db(app, connect=False):
+    # reading every table pulls its pages into the OS page cache. NOT INDEXED
+    # stops SQLite from answering from a smaller covering index instead.
+    # A server backend only gets its pool opened, and only when connect is
+    # set: under gunicorn --preload, create_app() runs in the master and
+    # its sockets would be shared by every forked worker.
+    tables = 0
+
+    with app.app_context():
+        if app.config["DATABASE_BACKEND"] != "sqlite":
+            if connect:
+                get_repository().backend.connection()
+            return tables
+
+        db = get_db()
+        for table, column in _PRIME_COLUMNS.items():
+            try:
+                db.execute(
+                    f"SELECT SUM(LENGTH({column})) FROM {table} NOT INDEXED"
+                ).fetchone()
+            except sqlite3.OperationalError:
+                continue
+            tables += 1
+
+    return tables
+
+
+def build_url_map(app):
+    adapter = app.url_map.bind(app.config.get("SERVER_NAME") or "localhost")
+    adapter.match("/")
+    return len(list(app.url_map.iter_rules()))
+
+
+def replay_requests(app):
+    client = app.test_client()
+    replayed = 0
+
+    for path in app.config["WARMUP_PATHS"]:
+        try:
+            client.get(path)
+        except Exception as e:
+            app.logger.warning(f"Warmup request to {path} failed: {e}")
+            continue
+        replayed += 1
+
+    return replayed
+
+
+def warmup(app, replay=None, connect=False):
+    """Compile templates, build the URL map and prime the database so the
+    first real requests of a new worker don't pay for it. connect also opens
+    the PostgreSQL pool, for use after forking. Returns a dict of step name
+    to (count, seconds)."""
+    steps = [
+        ("templates", compile_templates),
+        ("database", lambda app: prime_db(app, connect)),
+        ("urls", build_url_map),
+    ]
+
+    if replay is None:
+        replay = app.config["WARMUP_REPLAY"]
+    if replay:
+        steps.append(("requests", replay_requests))
+
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        count = step(app)
+        timings[name] = (count, time.perf_counter() - start)
+
+    app.logger.info(
+        "Warmup finished: " + ", ".join(
+            f"{name}={count} in {seconds * 1000:.1f} ms"
+            for name, (count, seconds) in timings.items()
+        )
+    )
+
+    return timings
+
+
+def post_fork(server, worker):
+    """gunicorn hook, use it with ``from bloggr.warmup import post_fork`` in
+    gunicorn.conf.py to warm every worker before it accepts requests."""
+    warmup(worker.app.wsgi(), connect=True)
+
+
+@click.command("warmup")
+@click.option("--replay/--no-replay", default=None, help="Also replay WARMUP_PATHS.")
+@with_appcontext
+def warmup_command(replay):
+    """Precompile templates and prime caches, reporting the timings."""
+    timings = warmup(current_app._get_current_object(), replay)
+
+    for name, (count, seconds) in timings.items():
+        click.echo(f"{name:<10} {count:>5} {seconds * 1000:>9.1f} ms")
+
+
+def init_app(app):
+    app.cli.add_command(warmup_command)